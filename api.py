@@ -0,0 +1,324 @@
+"""Local HTTP/JSON API over Manager for bulk ingest and queries.
+
+Endpoints:
+    GET  /health                      status, student count and last save error
+    GET  /students?offset=&limit=     paginated list, optional name/grade/age filters
+    GET  /students/<student_id>       one student
+    POST /students                    bulk add: a JSON list of student dicts
+    POST /attendance                  bulk update: [{"student_id": ..., "attendance": ...}]
+
+Each bulk request is one step in the "api" actor's undo history (UI sessions
+cannot undo it) and is applied under the manager's lock.
+Persistence is batched: writes mark the store dirty and a background thread
+saves at most once per `save_delay` seconds.
+
+Run standalone with `python api.py --port 8502`, or set STUDENT_API_PORT so
+app.py starts it next to the UI on the same in-memory store.
+"""
+import argparse
+import atexit
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import urlparse, parse_qs, unquote
+
+from models import Student
+from services import Manager, DataStorage
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not allowed")
+
+
+def _finite_float(text):
+    # Python's json reads 1e999 as inf; like NaN it would pass range checks
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"Number out of range: {text}")
+    return value
+
+
+class SaveScheduler():
+    """Coalesce many save requests into one write every `delay` seconds"""
+
+    def __init__(self, manager, storage, delay=0.5, retry_delay=5.0):
+        self.manager = manager
+        self.storage = storage
+        self.delay = delay
+        self.retry_delay = retry_delay
+        self.last_error = None
+        self._dirty = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="student-api-saver", daemon=True)
+        self._thread.start()
+
+    def request_save(self):
+        self._dirty.set()
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            # Let further writes pile up before saving them all at once
+            stopping = self._stopped.wait(self.delay)
+            self._dirty.clear()
+            try:
+                self.storage.save_to_json(self.manager)
+                self.last_error = None
+            except Exception as e:
+                # Keep the store dirty and try again later; dying here would
+                # silently drop every write acknowledged from now on
+                self.last_error = str(e)
+                print(f"Error: Failed to save students, retrying in {self.retry_delay}s: {str(e)}")
+                self._dirty.set()
+                if not stopping:
+                    self._stopped.wait(self.retry_delay)
+                    continue
+            if stopping:
+                return
+
+    def stop(self):
+        """Flush any pending save and stop the thread"""
+        self._stopped.set()
+        self._dirty.set()
+        self._thread.join()
+
+
+class _Server(ThreadingHTTPServer):
+    """One lightweight thread per connection, at most `workers` requests at once.
+
+    Keep-alive connections spend most of their life idle; limiting the work
+    rather than the connections means idle clients never starve busy ones.
+    """
+    daemon_threads = True
+    block_on_close = False   # server_close() must not wait for idle connections
+
+    def __init__(self, address, handler, workers):
+        super().__init__(address, handler)
+        self.slots = threading.BoundedSemaphore(workers)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # otherwise small keep-alive responses wait ~40ms for ACKs
+    timeout = 15                    # close connections idle (or stalled) this many seconds
+
+    # Set on the subclass built by make_server()
+    manager = None
+    saver = None
+
+    def log_message(self, format, *args):
+        # Per-request logging to stderr costs more than the requests themselves
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self, length):
+        # Standard JSON only: NaN and Infinity would slip past validation
+        return json.loads(self.rfile.read(length) or b"null",
+                          parse_constant=_reject_constant, parse_float=_finite_float)
+
+    def _content_length(self):
+        """Request body size; raises ValueError if the header is not a valid size"""
+        length = int(self.headers.get("Content-Length", 0))
+        if length < 0:
+            # rfile.read(-1) would wait for the client to close the connection
+            raise ValueError("Content-Length must not be negative")
+        return length
+
+    def do_GET(self):
+        with self.server.slots:
+            self._get()
+
+    def _get(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if parts == ["health"]:
+            self._send(200, {"status": "ok", "students": len(self.manager.students),
+                             "save_error": self.saver.last_error})
+        elif parts == ["students"]:
+            self._list_students(parse_qs(url.query))
+        elif len(parts) == 2 and parts[0] == "students":
+            student = self.manager.get_student(unquote(parts[1]))
+            if student is None:
+                self._send(404, {"error": "Student not found"})
+            else:
+                self._send(200, student.to_dict())
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip('/')
+        if path not in ("/students", "/attendance"):
+            self._send(404, {"error": "Not found"})
+            return
+        try:
+            length = self._content_length()
+        except ValueError as e:
+            self._send(400, {"error": f"Invalid Content-Length: {str(e)}"})
+            self.close_connection = True
+            return
+        try:
+            items = self._read_json(length)
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send(400, {"error": f"Invalid JSON: {str(e)}"})
+            return
+        if not isinstance(items, list):
+            self._send(400, {"error": "Request body must be a JSON list"})
+            return
+
+        # The body has been read; only the actual work counts against workers
+        with self.server.slots:
+            self._post(path, items)
+
+    def _post(self, path, items):
+        if path == "/students":
+            results = self._add_students(items)
+        else:
+            results = self._update_attendance(items)
+        if any(r["success"] for r in results):
+            self.saver.request_save()
+        self._send(200, {
+            "succeeded": sum(1 for r in results if r["success"]),
+            "failed": sum(1 for r in results if not r["success"]),
+            "results": results
+        })
+
+    def _list_students(self, query):
+        try:
+            offset = max(int(query.get("offset", ["0"])[0]), 0)
+            limit = min(max(int(query.get("limit", [str(DEFAULT_LIMIT)])[0]), 0), MAX_LIMIT)
+            filters = {}
+            if "name" in query:
+                filters["name"] = query["name"][0]
+            if "grade" in query:
+                filters["grade"] = query["grade"][0]
+            if "age" in query:
+                filters["age"] = int(query["age"][0])
+        except ValueError:
+            self._send(400, {"error": "offset, limit and age must be integers"})
+            return
+
+        if filters:
+            matches = self.manager.search_students(**filters)
+            total = len(matches)
+            page = matches[offset:offset + limit]
+        else:
+            # Page straight off a snapshot instead of copying every student
+            students = self.manager.students
+            total = len(students)
+            page = list(islice(students.values(), offset, offset + limit))
+        self._send(200, {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "students": [s.to_dict() for s in page]
+        })
+
+    def _add_students(self, items):
+        results = []
+        with self.manager.batch(f"API bulk add of {len(items)} students", actor="api"):
+            for item in items:
+                student_id = item.get("student_id") if isinstance(item, dict) else None
+                try:
+                    if not isinstance(item, dict):
+                        raise ValueError("Each student must be a JSON object")
+                    success, message = self.manager.add_student(Student.from_dict(item))
+                except KeyError as e:
+                    success, message = False, f"Missing field: {str(e)}"
+                except (ValueError, TypeError, OverflowError) as e:
+                    success, message = False, f"Validation error: {str(e)}"
+                results.append({"student_id": student_id, "success": success, "message": message})
+        return results
+
+    def _update_attendance(self, items):
+        results = []
+        with self.manager.batch(f"API attendance update of {len(items)} students", actor="api"):
+            for item in items:
+                if not isinstance(item, dict) or "student_id" not in item or "attendance" not in item:
+                    results.append({"student_id": None, "success": False,
+                                    "message": "Each item needs student_id and attendance"})
+                    continue
+                if not isinstance(item["student_id"], str):
+                    results.append({"student_id": None, "success": False,
+                                    "message": "student_id must be a string"})
+                    continue
+                success, message = self.manager.update_student(
+                    item["student_id"], attendance=item["attendance"])
+                results.append({"student_id": item["student_id"], "success": success, "message": message})
+        return results
+
+
+def make_server(manager, storage, host="127.0.0.1", port=8502, workers=8, save_delay=0.5):
+    """Build (server, saver) for the given store; call serve_forever() to run"""
+    saver = SaveScheduler(manager, storage, delay=save_delay)
+    handler = type("StudentAPIHandler", (_Handler,), {"manager": manager, "saver": saver})
+    return _Server((host, port), handler, workers), saver
+
+
+def start_in_background(manager, storage, host="127.0.0.1", port=8502, workers=8, after=None):
+    """Serve the API from a daemon thread (used by app.py) and return the server.
+
+    If `after` is a thread (e.g. the data loader), requests are only answered
+    once it has finished (and never if the load failed); until then they
+    wait in the listen backlog.
+    """
+    server, saver = make_server(manager, storage, host, port, workers)
+    # Flush batched writes when the host process (e.g. streamlit) exits
+    atexit.register(saver.stop)
+
+    def serve():
+        if after is not None:
+            after.join()
+        if storage.load_error:
+            # Never serve (and save) a store that failed to load
+            print(f"Error: Student API not started: {storage.load_error}")
+            server.server_close()
+            return
+        server.serve_forever()
+
+    threading.Thread(target=serve, name="student-api", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP API for the Student Management System")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=8,
+                        help="requests processed at once (connections are not limited)")
+    parser.add_argument("--json-file", default="students.json")
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument("--save-delay", type=float, default=0.5,
+                        help="seconds to batch writes before saving")
+    args = parser.parse_args()
+
+    manager = Manager()
+    storage = DataStorage(args.json_file, shards=args.shards)
+    storage.load_from_json(manager)
+    if storage.load_error:
+        raise SystemExit(f"Error: {storage.load_error}")
+
+    server, saver = make_server(manager, storage, args.host, args.port, args.workers, args.save_delay)
+    print(f"Student API listening on http://{args.host}:{args.port} ({len(manager.students)} students)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        saver.stop()
+
+
+if __name__ == "__main__":
+    main()
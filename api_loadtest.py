@@ -0,0 +1,134 @@
+"""Load test for api.py: reports requests/sec and latency percentiles.
+
+Start the API first (python api.py --json-file /tmp/loadtest.json), then:
+
+    python api_loadtest.py --concurrency 16 --requests 5000
+
+Every client thread keeps one HTTP/1.1 connection open and sends a mix of
+bulk adds, bulk attendance updates, paginated queries and single lookups.
+Student IDs are prefixed with --id-prefix so runs do not collide; point the
+API at a scratch JSON file, the generated students are persisted.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+FIRST_NAMES = ["Ali", "Fatima", "Ahmed", "Sara", "Usman", "Ayesha", "Bilal", "Zainab", "Hamza", "Maryam"]
+LAST_NAMES = ["Khan", "Ahmed", "Malik", "Hussain", "Raza", "Siddiqui", "Iqbal", "Sheikh"]
+
+
+def make_student(student_id):
+    return {
+        "student_id": student_id,
+        "name": f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}",
+        "age": random.randint(17, 30),
+        "grade": random.choice("ABCDEF"),
+        "email": f"{student_id.lower()}@example.com",
+        "phone": "03" + "".join(random.choice("0123456789") for _ in range(9)),
+        "courses": random.sample(["Mathematics", "Physics", "Chemistry", "Biology", "English"], 2),
+        "attendance": round(random.uniform(50, 100), 1)
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * pct / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Client():
+    def __init__(self, url, prefix, batch_size):
+        parsed = urlparse(url)
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.added = []
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.conn.getresponse()
+        response.read()
+        return response.status
+
+    def step(self, n):
+        """Send one request of the mix; returns (kind, status)"""
+        roll = random.random()
+        if roll < 0.2 or not self.added:
+            ids = [f"{self.prefix}-{n}-{i}" for i in range(self.batch_size)]
+            status = self.request("POST", "/students", [make_student(sid) for sid in ids])
+            self.added.extend(ids)
+            return "bulk_add", status
+        if roll < 0.4:
+            ids = random.sample(self.added, min(self.batch_size, len(self.added)))
+            payload = [{"student_id": sid, "attendance": round(random.uniform(0, 100), 1)} for sid in ids]
+            return "bulk_attendance", self.request("POST", "/attendance", payload)
+        if roll < 0.8:
+            offset = random.randint(0, 500)
+            return "list", self.request("GET", f"/students?offset={offset}&limit=50")
+        return "get", self.request("GET", f"/students/{random.choice(self.added)}")
+
+
+def run(args):
+    latencies = {}
+    errors = [0]
+    lock = threading.Lock()
+    per_thread = args.requests // args.concurrency
+
+    def worker(index):
+        client = Client(args.url, f"{args.id_prefix}{index}", args.batch_size)
+        local = {}
+        failed = 0
+        for n in range(per_thread):
+            start = time.perf_counter()
+            try:
+                kind, status = client.step(n)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                continue
+            local.setdefault(kind, []).append(time.perf_counter() - start)
+            if status >= 400:
+                failed += 1
+        with lock:
+            for kind, values in local.items():
+                latencies.setdefault(kind, []).extend(values)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{total} requests in {elapsed:.2f}s with {args.concurrency} clients "
+          f"-> {total / elapsed:.1f} requests/sec ({errors[0]} errors)")
+    print(f"{'endpoint':<18}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind, values in sorted(latencies.items()):
+        values.sort()
+        print(f"{kind:<18}{len(values):>8}"
+              f"{percentile(values, 50) * 1000:>10.2f}"
+              f"{percentile(values, 95) * 1000:>10.2f}"
+              f"{percentile(values, 99) * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Student Management HTTP API")
+    parser.add_argument("--url", default="http://127.0.0.1:8502")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="total requests across all clients")
+    parser.add_argument("--batch-size", type=int, default=20, help="students per bulk request")
+    parser.add_argument("--id-prefix", default=f"LT{int(time.time())}-")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,22 @@
+import os
+import subprocess
+import sys
+import time
+import uuid
 import streamlit as st
 from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
+
+# streamlit is already loaded by the server before this script runs, so only
+# our own modules can be timed here; the value is only meaningful the first
+# time the script runs in a process (later runs hit the module cache)
+_import_start = time.perf_counter()
 from models import Student
 from services import Manager, DataStorage
+_app_import_seconds = time.perf_counter() - _import_start
+# plotly is imported lazily on the Dashboard, the only page that draws charts
 
+COLD_IMPORT_MODULES = ["streamlit", "plotly.express", "plotly.graph_objects", "services"]
 
-# Initialize session state
-if 'manager' not in st.session_state:
-    st.session_state.manager = Manager()
-    st.session_state.storage = DataStorage()
-    st.session_state.storage.load_from_json(st.session_state.manager)
 
 # Page configuration
 st.set_page_config(
@@ -19,6 +25,95 @@ st.set_page_config(
     layout="wide"
 )
 
+def measure_cold_imports(modules):
+    """Import each module in a fresh interpreter with `python -X importtime`.
+    
+    Returns {module: seconds} for the requested modules imported at top
+    level, plus 'total' (everything imported, including interpreter startup).
+    This is what a cold worker pays before the first render.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    times = {'total': 0.0}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        # Top-level imports are indented by exactly one space
+        if name.startswith(" ") and not name.startswith("  "):
+            seconds = int(parts[1]) / 1e6
+            times['total'] += seconds
+            if name.strip() in modules:
+                times[name.strip()] = seconds
+    return times
+
+
+@st.cache_resource
+def get_store():
+    """One student store per server process, shared by all sessions and the HTTP API"""
+    # Process-wide startup report: filled in once, shared by every session
+    timings = {'app_import_seconds': _app_import_seconds}
+    manager = Manager()
+    shards = os.environ.get("STUDENTS_SHARDS")
+    storage = DataStorage(os.environ.get("STUDENTS_JSON", "students.json"),
+                          shards=int(shards) if shards else None)
+    # Data is loaded on a background thread so the page can render right away
+    loader = storage.load_in_background(manager)
+    
+    # Optional bulk-ingest API on the same in-memory store (see api.py)
+    api_port = os.environ.get("STUDENT_API_PORT")
+    if api_port:
+        import api
+        api.start_in_background(manager, storage,
+                                host=os.environ.get("STUDENT_API_HOST", "127.0.0.1"),
+                                port=int(api_port), after=loader)
+    return manager, storage, loader, timings
+
+
+# Initialize session state
+if 'manager' not in st.session_state:
+    manager, storage, loader, timings = get_store()
+    st.session_state.manager = manager
+    st.session_state.storage = storage
+    st.session_state.loader = loader
+    st.session_state.startup = timings
+    # Identifies this browser session's changes in the shared undo history
+    st.session_state.session_id = uuid.uuid4().hex
+
+
+def wait_for_data():
+    """Block until the background load has finished, showing a spinner meanwhile"""
+    loader = st.session_state.loader
+    if loader.is_alive():
+        with st.spinner("Loading student data..."):
+            loader.join()
+    if st.session_state.storage.load_error:
+        st.error(f"❌ Could not load student data: {st.session_state.storage.load_error}")
+        st.stop()
+
+def select_student(label, state_key):
+    """Student picker whose choice survives changes made by other sessions or the API.
+    
+    The chosen ID is kept in st.session_state[state_key]. Returns it, or None
+    (after a warning) if that student has been deleted in the meantime, so
+    callers never act on a different student than the one picked.
+    """
+    # Cached on the manager until the next change, so reruns don't rebuild it
+    student_ids, student_labels = st.session_state.manager.student_options()
+    chosen = st.session_state.get(state_key)
+    missing = chosen is not None and chosen not in student_labels
+    if missing:
+        st.warning(f"⚠️ Student {chosen} has been deleted in the meantime. Please select a student again.")
+    # A fixed key keeps the widget (and its selection) when the options change
+    selected = st.selectbox(label, student_ids,
+                            index=student_ids.index(chosen) if chosen in student_labels else 0,
+                            format_func=student_labels.get, key=f"{state_key}_select")
+    st.session_state[state_key] = selected
+    return None if missing else selected
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -64,11 +159,32 @@ menu = st.sidebar.radio(
     ["Dashboard", "Add Student", "View Students", "Update Student", "Delete Student", "Manage Attendance", "Search & Filter"]
 )
 
+# Undo / Redo (the manager keeps cheap snapshots of every change)
+# History is per session: you can only undo your own latest change, and only
+# while nobody else (another session or the HTTP API) has written since
+undo_label = st.session_state.manager.undo_label(st.session_state.session_id)
+redo_label = st.session_state.manager.redo_label(st.session_state.session_id)
+if st.sidebar.button(f"↩️ Undo {undo_label}" if undo_label else "↩️ Undo",
+                     disabled=undo_label is None, use_container_width=True):
+    success, message = st.session_state.manager.undo(st.session_state.session_id)
+    if success:
+        st.session_state.storage.save_to_json(st.session_state.manager)
+        st.rerun()
+    st.sidebar.warning(message)
+if st.sidebar.button(f"↪️ Redo {redo_label}" if redo_label else "↪️ Redo",
+                     disabled=redo_label is None, use_container_width=True):
+    success, message = st.session_state.manager.redo(st.session_state.session_id)
+    if success:
+        st.session_state.storage.save_to_json(st.session_state.manager)
+        st.rerun()
+    st.sidebar.warning(message)
+
 # Dashboard
 if menu == "Dashboard":
     st.header("Dashboard")
     
-    students = st.session_state.manager.list_students()
+    wait_for_data()
+    students = st.session_state.manager.view_students()
     
     # Metrics Row
     col1, col2, col3, col4 = st.columns(4)
@@ -77,15 +193,15 @@ if menu == "Dashboard":
         st.metric("Total Students", len(students))
     
     with col2:
-        grade_a = len([s for s in students if s.grade == 'A'])
+        grade_a = sum(1 for s in students if s.grade == 'A')
         st.metric("Grade A Students", grade_a)
     
     with col3:
-        avg_age = sum([s.age for s in students]) / len(students) if students else 0
+        avg_age = sum(s.age for s in students) / len(students) if students else 0
         st.metric("Average Age", f"{avg_age:.1f}")
     
     with col4:
-        low_attendance = len([s for s in students if s.attendance < 75])
+        low_attendance = sum(1 for s in students if s.attendance < 75)
         st.metric("Low Attendance", low_attendance, delta=None, delta_color="inverse")
     
     # Graphs Row
@@ -93,6 +209,16 @@ if menu == "Dashboard":
         st.markdown("---")
         st.subheader("Analytics")
         
+        # Imported here rather than at the top: plotly is slow to import and
+        # no other page needs it
+        plotly_cold = 'plotly.express' not in sys.modules
+        plotly_start = time.perf_counter()
+        import plotly.express as px
+        import plotly.graph_objects as go
+        if plotly_cold:
+            # First Dashboard render in this process pays the real import cost
+            st.session_state.startup['plotly_import_seconds'] = time.perf_counter() - plotly_start
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -118,9 +244,9 @@ if menu == "Dashboard":
         with col2:
             # Attendance Bar Chart
             attendance_ranges = {
-                '90-100%': len([s for s in students if s.attendance >= 90]),
-                '75-89%': len([s for s in students if 75 <= s.attendance < 90]),
-                'Below 75%': len([s for s in students if s.attendance < 75])
+                '90-100%': sum(1 for s in students if s.attendance >= 90),
+                '75-89%': sum(1 for s in students if 75 <= s.attendance < 90),
+                'Below 75%': sum(1 for s in students if s.attendance < 75)
             }
             
             fig_bar = go.Figure(data=[
@@ -143,7 +269,7 @@ if menu == "Dashboard":
     st.markdown("---")
     st.subheader("👥 Recent Students")
     if students:
-        for student in students[-5:]:
+        for student in st.session_state.manager.recent_students(5):
             # Check if attendance is low
             attendance_color = "🔴" if student.attendance < 75 else "🟢"
             
@@ -195,7 +321,9 @@ elif menu == "Add Student":
                         for course in courses.split(','):
                             student.add_course(course.strip())
                     
-                    success, message = st.session_state.manager.add_student(student)
+                    wait_for_data()
+                    success, message = st.session_state.manager.add_student(
+                        student, actor=st.session_state.session_id)
                     
                     if success:
                         st.session_state.storage.save_to_json(st.session_state.manager)
@@ -217,7 +345,8 @@ elif menu == "Add Student":
 elif menu == "View Students":
     st.header("👥 All Students")
     
-    students = st.session_state.manager.list_students()
+    wait_for_data()
+    students = st.session_state.manager.view_students()
     
     if students:
         st.write(f"Total: {len(students)} students")
@@ -260,15 +389,15 @@ elif menu == "View Students":
 elif menu == "Update Student":
     st.header("✏️ Update Student")
     
-    students = st.session_state.manager.list_students()
+    wait_for_data()
     
-    if students:
-        student_options = {f"{s.student_id} - {s.name}": s.student_id for s in students}
-        selected = st.selectbox("Select Student to Update", list(student_options.keys()))
+    if st.session_state.manager.count_students():
+        selected = select_student("Select Student to Update", "update_student_id")
+        # Re-read it: another session or the API may have removed it since
+        student = st.session_state.manager.get_student(selected) if selected else None
         
-        if selected:
-            student_id = student_options[selected]
-            student = st.session_state.manager.get_student(student_id)
+        if student:
+            student_id = selected
             
             with st.form("update_student_form"):
                 col1, col2 = st.columns(2)
@@ -295,17 +424,16 @@ elif menu == "Update Student":
                         # Create a temporary student object to validate
                         temp_student = Student(student_id, name, age, grade, email, phone, attendance)
                         
-                        # Update courses
-                        student.courses = [c.strip() for c in courses.split(',') if c.strip()]
-                        
                         success, message = st.session_state.manager.update_student(
                             student_id,
+                            actor=st.session_state.session_id,
                             name=name,
                             age=age,
                             grade=grade,
                             email=email,
                             phone=phone,
-                            attendance=attendance
+                            attendance=attendance,
+                            courses=[c.strip() for c in courses.split(',') if c.strip()]
                         )
                         
                         if success:
@@ -330,20 +458,21 @@ elif menu == "Update Student":
 elif menu == "Delete Student":
     st.header("🗑️ Delete Student")
     
-    students = st.session_state.manager.list_students()
+    wait_for_data()
     
-    if students:
-        student_options = {f"{s.student_id} - {s.name}": s.student_id for s in students}
-        selected = st.selectbox("Select Student to Delete", list(student_options.keys()))
+    if st.session_state.manager.count_students():
+        selected = select_student("Select Student to Delete", "delete_student_id")
+        # Re-read it: another session or the API may have removed it since
+        student = st.session_state.manager.get_student(selected) if selected else None
         
-        if selected:
-            student_id = student_options[selected]
-            student = st.session_state.manager.get_student(student_id)
+        if student:
+            student_id = selected
             
             @st.dialog("⚠️ Confirm Delete Student")
             def delete_student_dialog(student_to_delete):
                 st.error("**WARNING: Are you sure you want to delete this student?**")
-                st.warning("This action cannot be undone!")
+                st.warning("You can restore this student with Undo in the sidebar, "
+                           "as long as nobody else changes the data first.")
                 
                 # Show student details in a nice format
                 st.markdown("---")
@@ -363,7 +492,8 @@ elif menu == "Delete Student":
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("🗑️ Yes, Delete Student", type="primary", use_container_width=True):
-                        success, message = st.session_state.manager.delete_student(student_to_delete.student_id)
+                        success, message = st.session_state.manager.delete_student(
+                            student_to_delete.student_id, actor=st.session_state.session_id)
                         
                         if success:
                             st.session_state.storage.save_to_json(st.session_state.manager)
@@ -387,7 +517,8 @@ elif menu == "Delete Student":
 elif menu == "Manage Attendance":
     st.header("📊 Manage Attendance")
     
-    students = st.session_state.manager.list_students()
+    wait_for_data()
+    students = st.session_state.manager.view_students()
     
     if students:
         st.subheader("Bulk Attendance Update")
@@ -407,7 +538,7 @@ elif menu == "Manage Attendance":
         elif filter_option == "Good Attendance (≥75%)":
             filtered_students = [s for s in students if s.attendance >= 75]
         else:
-            filtered_students = students
+            filtered_students = list(students)
         
         # Apply sorting
         if sort_option == "Name (A-Z)":
@@ -466,6 +597,7 @@ elif menu == "Manage Attendance":
                 if st.button("✏️ Update", key=f"btn_{student.student_id}"):
                     success, message = st.session_state.manager.update_student(
                         student.student_id,
+                        actor=st.session_state.session_id,
                         attendance=new_attendance
                     )
                     
@@ -492,8 +624,10 @@ elif menu == "Manage Attendance":
         with col1:
             st.write("**Mark all as present (100%)**")
             if st.button("✅ Set All to 100%", use_container_width=True):
-                for student in st.session_state.manager.list_students():
-                    st.session_state.manager.update_student(student.student_id, attendance=100.0)
+                with st.session_state.manager.batch("set all attendance to 100%",
+                                                    actor=st.session_state.session_id):
+                    for student in st.session_state.manager.view_students():
+                        st.session_state.manager.update_student(student.student_id, attendance=100.0)
                 st.session_state.storage.save_to_json(st.session_state.manager)
                 
                 @st.dialog("✅ Bulk Update Complete!")
@@ -509,8 +643,10 @@ elif menu == "Manage Attendance":
             custom_value = st.number_input("Set custom attendance % for all", 
                                           min_value=0.0, max_value=100.0, value=100.0, step=0.1)
             if st.button(f"📝 Set All to {custom_value}%", use_container_width=True):
-                for student in st.session_state.manager.list_students():
-                    st.session_state.manager.update_student(student.student_id, attendance=custom_value)
+                with st.session_state.manager.batch(f"set all attendance to {custom_value}%",
+                                                    actor=st.session_state.session_id):
+                    for student in st.session_state.manager.view_students():
+                        st.session_state.manager.update_student(student.student_id, attendance=custom_value)
                 st.session_state.storage.save_to_json(st.session_state.manager)
                 
                 @st.dialog("✅ Bulk Update Complete!")
@@ -548,10 +684,11 @@ elif menu == "Search & Filter":
     if search_age > 0:
         filters['age'] = search_age
     
+    wait_for_data()
     if filters:
         results = st.session_state.manager.search_students(**filters)
     else:
-        results = st.session_state.manager.list_students()
+        results = st.session_state.manager.view_students()
     
     st.subheader(f"Results: {len(results)} students found")
     
@@ -592,4 +729,28 @@ elif menu == "Search & Filter":
 # Footer
 st.sidebar.markdown("---")
 st.sidebar.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-st.sidebar.success(f"Total students in database: {len(st.session_state.manager.list_students())}")
+if st.session_state.loader.is_alive():
+    st.sidebar.info("Loading student data...")
+else:
+    st.sidebar.success(f"Total students in database: {st.session_state.manager.count_students()}")
+
+    # Startup-time report
+    startup = st.session_state.startup
+    with st.sidebar.expander("⏱️ Startup Timings (this server process)"):
+        st.write(f"App modules import: {startup['app_import_seconds'] * 1000:.1f} ms")
+        st.write(f"Data load: {st.session_state.storage.load_seconds * 1000:.1f} ms")
+        if 'plotly_import_seconds' in startup:
+            st.write(f"Plotly import (first Dashboard): {startup['plotly_import_seconds'] * 1000:.1f} ms")
+        else:
+            st.write("Plotly import: not loaded yet (no Dashboard render)")
+        
+        # streamlit itself is imported before the script runs, so its cold
+        # cost can only be measured in a fresh interpreter
+        if 'cold_imports' not in startup:
+            if st.button("Measure cold imports", use_container_width=True):
+                with st.spinner("Running python -X importtime..."):
+                    startup['cold_imports'] = measure_cold_imports(COLD_IMPORT_MODULES)
+        if 'cold_imports' in startup:
+            st.write("Cold imports (fresh interpreter):")
+            for module, seconds in startup['cold_imports'].items():
+                st.write(f"- {module}: {seconds * 1000:.1f} ms")
@@ -0,0 +1,274 @@
+"""Headless load test for app.py built on Streamlit's AppTest.
+
+Simulates many simultaneous user sessions: each session is an AppTest
+driving the real pages (Dashboard, View Students, Search & Filter and, now
+and then, the bulk "Set All to 100%" attendance button) over a synthetic
+dataset. Reports rerun latency percentiles per action, overall reruns/sec
+and memory: what one worker pays once for the shared store, and what each
+session adds on top of it.
+
+    python app_loadtest.py --students 2000 --sessions 8 --iterations 5
+
+Every session runs in its own process. AppTest installs and tears down
+Streamlit's process-global Runtime on each run, so sessions cannot share a
+process. This means each session also has its own copy of the student store
+and of the dataset file (written to a temp dir via STUDENTS_JSON, so the real
+students.json is never touched). What this measures is the cost of each
+rerun while N sessions compete for the machine's CPUs. It does not model
+GIL contention between sessions inside one Streamlit worker, where the
+numbers would be worse once sessions exceed one core's worth of work.
+
+For the same reason each session process's memory growth includes its own
+store. A separate process loads the store with no session running; that
+baseline is reported on its own and subtracted from the per-session figure,
+since a real worker shares one store between all sessions (st.cache_resource).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from api_loadtest import make_student, percentile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+PAGES = ["Dashboard", "View Students", "Search & Filter"]
+SEARCH_TERMS = ["Ali", "Khan", "Sara", "Malik", "a"]
+
+
+def write_dataset(path, count):
+    data = {}
+    for i in range(count):
+        student = make_student(f"S{i:06d}")
+        data[student["student_id"]] = student
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _store_baseline(dataset):
+    """Memory (MB) one worker pays once, shared by all its sessions.
+    
+    Runs in a fresh process: after the imports a session process has made
+    when its "after imports" figure is taken, load what the app loads
+    (our modules, plotly, the student store) with no session running.
+    """
+    from streamlit.testing.v1 import AppTest  # noqa: F401, as Session() does
+    before = _peak_rss_mb()
+    from services import Manager, DataStorage
+    try:
+        import plotly.express  # noqa: F401, imported by the Dashboard
+    except ImportError:
+        pass
+    modules = _peak_rss_mb()
+    manager = Manager()
+    storage = DataStorage(dataset)
+    storage.load_from_json(manager)
+    return {"modules_mb": modules - before, "store_mb": _peak_rss_mb() - modules}
+
+
+class SessionFailed(Exception):
+    """The app did not render what the session needs; stop driving it"""
+
+
+class Session():
+    """One simulated user: an AppTest with its own session state"""
+
+    def __init__(self, timeout):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.timings = {}
+
+    def _timed(self, action, fn):
+        start = time.perf_counter()
+        fn()
+        self.timings.setdefault(action, []).append(time.perf_counter() - start)
+        if self.at.exception:
+            raise SessionFailed(f"{action}: {self.at.exception[0].value}")
+
+    def open_page(self, page):
+        if not self.at.sidebar.radio:
+            raise SessionFailed(f"{page}: navigation not rendered")
+        self._timed(page, lambda: self.at.sidebar.radio[0].set_value(page).run())
+
+    def start(self):
+        self._timed("first load", self.at.run)
+
+    def search(self):
+        self.open_page("Search & Filter")
+        box = next((w for w in self.at.text_input if w.label == "Search by Name"), None)
+        if box is None:
+            raise SessionFailed("Search & Filter: search box not rendered")
+        term = random.choice(SEARCH_TERMS)
+        self._timed("search query", lambda: box.set_value(term).run())
+
+    def bulk_attendance(self):
+        self.open_page("Manage Attendance")
+        button = next((b for b in self.at.button if b.label == "✅ Set All to 100%"), None)
+        if button is None:
+            raise SessionFailed("Manage Attendance: bulk button not rendered")
+        self._timed("bulk attendance", lambda: button.click().run())
+
+    def iterate(self, bulk_ratio):
+        for page in PAGES:
+            if page == "Search & Filter":
+                self.search()
+            else:
+                self.open_page(page)
+        if random.random() < bulk_ratio:
+            self.bulk_attendance()
+
+
+def _session_process(index, args, dataset, start_barrier, results):
+    """Body of one session process; puts a result dict on `results`"""
+    result = {"index": index, "timings": {}, "error": None}
+    session = None
+    try:
+        # A private copy, since bulk attendance saves back to the file
+        data_file = os.path.join(os.path.dirname(dataset), f"session-{index}.json")
+        shutil.copy(dataset, data_file)
+        os.environ["STUDENTS_JSON"] = data_file
+        random.seed(None if args.seed is None else args.seed + index)
+        session = Session(args.timeout)
+        result["rss_before_mb"] = _peak_rss_mb()
+    except Exception as e:
+        result["error"] = f"setup: {type(e).__name__}: {e}"
+
+    # Start all sessions together once they have paid their imports; a failed
+    # session still arrives so the others are not kept waiting
+    try:
+        start_barrier.wait(timeout=args.timeout)
+    except threading.BrokenBarrierError:
+        # Another session or the parent never arrived; don't run unsynchronised
+        result["error"] = result["error"] or "start barrier broken (another process did not start in time)"
+        session = None
+    if session is not None:
+        try:
+            session.start()
+            for _ in range(args.iterations):
+                session.iterate(args.bulk_ratio)
+        except Exception as e:
+            # Includes a failed first load: the session stops here rather than
+            # piling up follow-on errors
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["timings"] = session.timings
+    result["rss_peak_mb"] = _peak_rss_mb()
+    results.put(result)
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="sms-loadtest-")
+    processes = []
+    try:
+        dataset = os.path.join(workdir, "dataset.json")
+        write_dataset(dataset, args.students)
+        print(f"Dataset: {args.students} students, {args.sessions} session processes, "
+              f"{os.cpu_count()} CPUs")
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            baseline = pool.submit(_store_baseline, dataset).result(timeout=args.timeout)
+
+        start_barrier = context.Barrier(args.sessions + 1)
+        results = context.Queue()
+        processes = [context.Process(target=_session_process,
+                                     args=(i, args, dataset, start_barrier, results))
+                     for i in range(args.sessions)]
+        for p in processes:
+            p.start()
+
+        try:
+            start_barrier.wait(timeout=args.timeout)
+        except threading.BrokenBarrierError:
+            print("Error: not every session process started in time; collecting what ran")
+        start = time.perf_counter()
+        collected = _collect(processes, results, args.timeout * (args.iterations * 5 + 2))
+        elapsed = time.perf_counter() - start
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+            p.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report(args, collected, elapsed, baseline)
+
+
+def _collect(processes, results, timeout):
+    """Gather one result per session; give up on sessions that die or overrun"""
+    collected = []
+    deadline = time.monotonic() + timeout
+    while len(collected) < len(processes):
+        try:
+            collected.append(results.get(timeout=1))
+        except queue.Empty:
+            if time.monotonic() > deadline or not any(p.is_alive() for p in processes):
+                break
+    reported = {r["index"] for r in collected}
+    for index in range(len(processes)):
+        if index not in reported:
+            collected.append({"index": index, "timings": {},
+                              "error": "no result (process crashed or timed out)"})
+    return collected
+
+
+def report(args, collected, elapsed, baseline):
+    timings = {}
+    failed = sorted((r for r in collected if r["error"]), key=lambda r: r["index"])
+    for r in collected:
+        for action, values in r["timings"].items():
+            timings.setdefault(action, []).extend(values)
+    reruns = sum(len(v) for v in timings.values())
+
+    print(f"{args.sessions} sessions x {args.iterations} iterations: {reruns} reruns in "
+          f"{elapsed:.2f}s -> {reruns / elapsed:.1f} reruns/sec "
+          f"({len(failed)} session(s) stopped early)")
+    for r in failed:
+        print(f"  session {r['index']}: {r['error']}")
+    print(f"{'action':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for action, values in sorted(timings.items()):
+        values.sort()
+        print(f"{action:<20}{len(values):>7}"
+              f"{percentile(values, 50) * 1000:>10.1f}"
+              f"{percentile(values, 95) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}"
+              f"{values[-1] * 1000:>10.1f}")
+
+    shared = baseline["modules_mb"] + baseline["store_mb"]
+    print(f"Memory paid once per worker (no session running): store {baseline['store_mb']:.1f} MB, "
+          f"app modules incl. plotly {baseline['modules_mb']:.1f} MB")
+    ran = [r for r in collected if "rss_peak_mb" in r and "rss_before_mb" in r]
+    if ran:
+        peak = sorted(r["rss_peak_mb"] for r in ran)
+        growth = sorted(r["rss_peak_mb"] - r["rss_before_mb"] - shared for r in ran)
+        print(f"Memory per session on top of that: p50 {percentile(growth, 50):.1f} MB, "
+              f"max {growth[-1]:.1f} MB (session process peak RSS p50 {percentile(peak, 50):.0f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit app")
+    parser.add_argument("--students", type=int, default=1000, help="synthetic dataset size")
+    parser.add_argument("--sessions", type=int, default=4, help="simultaneous simulated users")
+    parser.add_argument("--iterations", type=int, default=3, help="page cycles per session")
+    parser.add_argument("--bulk-ratio", type=float, default=0.1,
+                        help="chance per iteration of a bulk attendance update")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
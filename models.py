@@ -73,5 +73,43 @@ class Student():
             'attendance': self.attendance
         }
     
+    @classmethod
+    def from_dict(cls, data):
+        """Build a validated student from a to_dict()-style dictionary"""
+        student = cls(
+            data['student_id'],
+            data['name'],
+            data['age'],
+            data['grade'],
+            data['email'],
+            data['phone'],
+            data.get('attendance', 100.0)
+        )
+        student.courses = cls.validate_courses(data.get('courses', []))
+        return student
+    
+    @staticmethod
+    def validate_courses(courses):
+        """Return a copy of courses, which must be a list of strings"""
+        if not isinstance(courses, list) or not all(isinstance(c, str) for c in courses):
+            raise ValueError("Courses must be a list of strings")
+        return list(courses)
+    
+    def to_record(self):
+        """Plain tuple of the fields; cheap to pickle between processes"""
+        return (self.student_id, self.name, self.age, self.grade, self.email,
+                self.phone, self.attendance, self.courses)
+    
+    @classmethod
+    def from_record(cls, record):
+        """Rebuild a student from to_record() output without re-validating.
+        
+        Only use this on records produced from an already validated Student.
+        """
+        student = cls.__new__(cls)
+        (student.student_id, student.name, student.age, student.grade, student.email,
+         student.phone, student.attendance, student.courses) = record
+        return student
+    
     def __str__(self):
         return f"ID: {self.student_id}, Name: {self.name}, Age: {self.age}, Grade: {self.grade}"
@@ -0,0 +1,386 @@
+import gc
+from collections.abc import Mapping, ItemsView, KeysView, ValuesView
+from contextlib import contextmanager
+
+# Both tries below branch 32 ways, using 5 bits of the index (or hash) per level
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+HASH_MASK = (1 << 64) - 1
+
+
+@contextmanager
+def paused_gc():
+    """Pause the cyclic garbage collector while building many acyclic objects.
+    
+    Each burst of allocations otherwise triggers collections that rescan every
+    live object (e.g. 100k loaded students), which dominates bulk builds.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+# ---------------------------------------------------------------------------
+# Persistent vector: an append-only trie of 32-slot lists.
+# Every update copies only the nodes on the path to the changed slot, so old
+# versions stay valid and share everything else with the new one.
+# ---------------------------------------------------------------------------
+
+def _vec_get(node, shift, index):
+    while shift > 0:
+        node = node[(index >> shift) & MASK]
+        shift -= BITS
+    return node[index & MASK]
+
+
+def _vec_set(node, shift, index, value):
+    node = list(node)
+    if shift == 0:
+        node[index & MASK] = value
+    else:
+        i = (index >> shift) & MASK
+        node[i] = _vec_set(node[i], shift - BITS, index, value)
+    return node
+
+
+def _vec_append(node, shift, index, value):
+    node = list(node) if node is not None else []
+    if shift == 0:
+        node.append(value)
+    else:
+        i = (index >> shift) & MASK
+        if i < len(node):
+            node[i] = _vec_append(node[i], shift - BITS, index, value)
+        else:
+            node.append(_vec_append(None, shift - BITS, index, value))
+    return node
+
+
+def _vec_build(values):
+    """Build a vector from a list in one pass; returns (root, shift)"""
+    level = [values[i:i + WIDTH] for i in range(0, len(values), WIDTH)] or [[]]
+    shift = 0
+    while len(level) > 1:
+        level = [level[i:i + WIDTH] for i in range(0, len(level), WIDTH)]
+        shift += BITS
+    return level[0], shift
+
+
+def _vec_iter(node, shift):
+    if shift == 0:
+        yield from node
+    else:
+        for child in node:
+            yield from _vec_iter(child, shift - BITS)
+
+
+def _vec_reversed(node, shift):
+    if shift == 0:
+        yield from reversed(node)
+    else:
+        for child in reversed(node):
+            yield from _vec_reversed(child, shift - BITS)
+
+
+# ---------------------------------------------------------------------------
+# Hash array mapped trie (HAMT): the persistent key -> position index.
+# ---------------------------------------------------------------------------
+
+class _Entry():
+    __slots__ = ('hash', 'key', 'value')
+
+    def __init__(self, h, key, value):
+        self.hash = h
+        self.key = key
+        self.value = value
+
+
+class _Collision():
+    """Entries whose full 64-bit hashes are equal"""
+    __slots__ = ('hash', 'entries')
+
+    def __init__(self, h, entries):
+        self.hash = h
+        self.entries = entries
+
+
+class _Node():
+    __slots__ = ('bitmap', 'items')
+
+    def __init__(self, bitmap, items):
+        self.bitmap = bitmap
+        self.items = items
+
+
+_EMPTY_NODE = _Node(0, [])
+
+
+def _hash(key):
+    return hash(key) & HASH_MASK
+
+
+def _slot(node, h, shift):
+    bit = 1 << ((h >> shift) & MASK)
+    return bit, bin(node.bitmap & (bit - 1)).count('1')
+
+
+def _merge(leaf1, leaf2, shift):
+    """Build the smallest subtree holding two leaves with different keys"""
+    if leaf1.hash == leaf2.hash:
+        entries = leaf1.entries if isinstance(leaf1, _Collision) else [leaf1]
+        return _Collision(leaf1.hash, entries + [leaf2])
+    b1 = (leaf1.hash >> shift) & MASK
+    b2 = (leaf2.hash >> shift) & MASK
+    if b1 == b2:
+        return _Node(1 << b1, [_merge(leaf1, leaf2, shift + BITS)])
+    if b1 < b2:
+        return _Node((1 << b1) | (1 << b2), [leaf1, leaf2])
+    return _Node((1 << b1) | (1 << b2), [leaf2, leaf1])
+
+
+def _hamt_build(entries, shift):
+    """Build a node for entries with distinct keys, bucketing by hash bits.
+    
+    Each node is created once, instead of copying the path on every insert.
+    """
+    buckets = [None] * WIDTH
+    for entry in entries:
+        i = (entry.hash >> shift) & MASK
+        if buckets[i] is None:
+            buckets[i] = [entry]
+        else:
+            buckets[i].append(entry)
+    bitmap = 0
+    items = []
+    for i, bucket in enumerate(buckets):
+        if bucket is None:
+            continue
+        bitmap |= 1 << i
+        if len(bucket) == 1:
+            items.append(bucket[0])
+        elif shift + BITS >= 64:
+            # Every hash bit is used up, so these hashes are identical
+            items.append(_Collision(bucket[0].hash, bucket))
+        else:
+            items.append(_hamt_build(bucket, shift + BITS))
+    return _Node(bitmap, items)
+
+
+def _hamt_get(node, h, key, default):
+    shift = 0
+    while True:
+        bit, idx = _slot(node, h, shift)
+        if not node.bitmap & bit:
+            return default
+        item = node.items[idx]
+        if isinstance(item, _Node):
+            node = item
+            shift += BITS
+        elif isinstance(item, _Entry):
+            return item.value if item.key == key else default
+        else:
+            for entry in item.entries:
+                if entry.key == key:
+                    return entry.value
+            return default
+
+
+def _hamt_assoc(node, shift, h, key, value):
+    """Return (new_node, added) with key set to value"""
+    bit, idx = _slot(node, h, shift)
+    if not node.bitmap & bit:
+        items = node.items[:idx] + [_Entry(h, key, value)] + node.items[idx:]
+        return _Node(node.bitmap | bit, items), True
+
+    item = node.items[idx]
+    added = True
+    if isinstance(item, _Node):
+        child, added = _hamt_assoc(item, shift + BITS, h, key, value)
+    elif isinstance(item, _Entry):
+        if item.key == key:
+            child, added = _Entry(h, key, value), False
+        else:
+            child = _merge(item, _Entry(h, key, value), shift + BITS)
+    elif item.hash == h:
+        entries = [e for e in item.entries if e.key != key]
+        added = len(entries) == len(item.entries)
+        child = _Collision(h, entries + [_Entry(h, key, value)])
+    else:
+        child = _merge(item, _Entry(h, key, value), shift + BITS)
+
+    items = list(node.items)
+    items[idx] = child
+    return _Node(node.bitmap, items), added
+
+
+def _hamt_dissoc(node, shift, h, key):
+    """Return (replacement, removed); replacement may be a leaf or None"""
+    bit, idx = _slot(node, h, shift)
+    if not node.bitmap & bit:
+        return node, False
+
+    item = node.items[idx]
+    if isinstance(item, _Node):
+        child, removed = _hamt_dissoc(item, shift + BITS, h, key)
+        if not removed:
+            return node, False
+    elif isinstance(item, _Entry):
+        if item.key != key:
+            return node, False
+        child = None
+    else:
+        entries = [e for e in item.entries if e.key != key]
+        if len(entries) == len(item.entries):
+            return node, False
+        child = entries[0] if len(entries) == 1 else _Collision(h, entries)
+
+    if child is None:
+        bitmap = node.bitmap & ~bit
+        if not bitmap:
+            return None, True
+        items = node.items[:idx] + node.items[idx + 1:]
+    else:
+        bitmap = node.bitmap
+        items = list(node.items)
+        items[idx] = child
+
+    # A node left holding a single leaf is pulled up into its parent
+    if shift > 0 and len(items) == 1 and not isinstance(items[0], _Node):
+        return items[0], True
+    return _Node(bitmap, items), True
+
+
+# ---------------------------------------------------------------------------
+# Public mapping
+# ---------------------------------------------------------------------------
+
+class _ItemsView(ItemsView):
+    def __iter__(self):
+        return self._mapping._iter_entries()
+
+
+class _ValuesView(ValuesView):
+    def __iter__(self):
+        for _, value in self._mapping._iter_entries():
+            yield value
+
+
+class PersistentMap(Mapping):
+    """Immutable, insertion-ordered mapping with structural sharing.
+
+    `set` and `delete` return a new map in O(log32 n) and leave the original
+    untouched, so holding on to an old map is an O(1) snapshot.
+    """
+
+    def __init__(self, items=None):
+        self._index = _EMPTY_NODE   # HAMT: key -> position in _entries
+        self._entries = []          # vector of (key, value), None once deleted
+        self._shift = 0
+        self._size = 0              # slots used in _entries, including deleted
+        self._len = 0
+        if items is not None:
+            # Bulk build: a dict gives last-value-wins with first-seen order,
+            # the same result as calling set() for each pair
+            if isinstance(items, Mapping):
+                items = items.items()
+            pairs = list(dict(items).items())
+            with paused_gc():
+                self._entries, self._shift = _vec_build(pairs)
+                if pairs:
+                    self._index = _hamt_build(
+                        [_Entry(_hash(key), key, pos) for pos, (key, _) in enumerate(pairs)], 0)
+            self._size = self._len = len(pairs)
+
+    def _evolve(self, index, entries, shift, size, length):
+        new = PersistentMap.__new__(PersistentMap)
+        new._index = index
+        new._entries = entries
+        new._shift = shift
+        new._size = size
+        new._len = length
+        return new
+
+    def _iter_entries(self):
+        for entry in _vec_iter(self._entries, self._shift):
+            if entry is not None:
+                yield entry
+
+    def __getitem__(self, key):
+        pos = _hamt_get(self._index, _hash(key), key, None)
+        if pos is None:
+            raise KeyError(key)
+        return _vec_get(self._entries, self._shift, pos)[1]
+
+    def __contains__(self, key):
+        return _hamt_get(self._index, _hash(key), key, None) is not None
+
+    def get(self, key, default=None):
+        pos = _hamt_get(self._index, _hash(key), key, None)
+        if pos is None:
+            return default
+        return _vec_get(self._entries, self._shift, pos)[1]
+
+    def __iter__(self):
+        for key, _ in self._iter_entries():
+            yield key
+
+    def __reversed__(self):
+        for entry in _vec_reversed(self._entries, self._shift):
+            if entry is not None:
+                yield entry[0]
+
+    def __len__(self):
+        return self._len
+
+    def keys(self):
+        return KeysView(self)
+
+    def items(self):
+        return _ItemsView(self)
+
+    def values(self):
+        return _ValuesView(self)
+
+    def set(self, key, value):
+        """Return a new map with key set to value"""
+        h = _hash(key)
+        pos = _hamt_get(self._index, h, key, None)
+        if pos is not None:
+            entries = _vec_set(self._entries, self._shift, pos, (key, value))
+            return self._evolve(self._index, entries, self._shift, self._size, self._len)
+
+        pos = self._size
+        shift = self._shift
+        entries = self._entries
+        if pos == 1 << (shift + BITS):
+            entries = [entries]
+            shift += BITS
+        entries = _vec_append(entries, shift, pos, (key, value))
+        index, _ = _hamt_assoc(self._index, 0, h, key, pos)
+        return self._evolve(index, entries, shift, pos + 1, self._len + 1)
+
+    def delete(self, key):
+        """Return a new map without key; raises KeyError if it is missing"""
+        h = _hash(key)
+        pos = _hamt_get(self._index, h, key, None)
+        if pos is None:
+            raise KeyError(key)
+
+        index, _ = _hamt_dissoc(self._index, 0, h, key)
+        if index is None:
+            index = _EMPTY_NODE
+        entries = _vec_set(self._entries, self._shift, pos, None)
+        new = self._evolve(index, entries, self._shift, self._size, self._len - 1)
+
+        # Rebuild once deleted slots outnumber live ones (amortised O(1))
+        if new._size > WIDTH and new._size - new._len > new._len:
+            return PersistentMap(new._iter_entries())
+        return new
+
+    def __repr__(self):
+        return f"PersistentMap({dict(self._iter_entries())!r})"
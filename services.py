@@ -1,20 +1,177 @@
+import functools
 import json
+import multiprocessing
 import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from models import Student
+from persistent import PersistentMap, paused_gc
+
+
+def _synchronized(method):
+    """Run a Manager method while holding the manager's lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class Manager():
-    def __init__(self):
-        self.students = {}
+    """Student store shared by all UI sessions and the HTTP API.
+
+    Stored Student objects must never be modified in place: change them
+    through update_student(), which swaps in a new object. Snapshots, undo
+    history and DataStorage's dirty-shard detection (which compares object
+    identity) all rely on this. get_student(), list_students() and
+    view_students() hand out the stored objects themselves, so treat them
+    as read-only.
+    """
+
+    def __init__(self, history_limit=50):
+        # Persistent map: every mutation swaps in a new map, so keeping a
+        # reference to the old one is a free snapshot for undo/redo.
+        # Student objects are never modified in place once stored.
+        # Writers serialise on _lock; readers need no lock because they only
+        # ever see a complete map.
+        self.version = 0
+        self.students = PersistentMap()
+        self._lock = threading.RLock()
+        self.history_limit = history_limit
+        # Undo/redo history is kept per actor (a UI session, the API, ...) as
+        # (before, after, label) entries, so nobody can undo someone else's
+        # change. An entry is only usable while the store is still exactly
+        # `after` (undo) or `before` (redo), i.e. nobody has written since,
+        # so only the latest writer's history is kept (see _push_history).
+        self._undo_stacks = {}
+        self._redo_stacks = {}
+        self._batch_depth = 0
+        self._options_cache = (None, (), {})
+    
+    @property
+    def students(self):
+        return self._students
+    
+    @students.setter
+    def students(self, students):
+        # Every change replaces the map, so this is the one place to bump the
+        # version that read caches are keyed on
+        self._students = students
+        self.version += 1
+    
+    def _commit(self, students, label, actor):
+        """Swap in a new map and record the change in actor's undo history"""
+        before = self.students
+        self.students = students
+        if not self._batch_depth:
+            self._push_history(actor, before, students, label)
+    
+    def _push_history(self, actor, before, after, label):
+        stack = self._undo_stacks.get(actor, [])
+        if stack and stack[-1][1] is not before:
+            # Someone else wrote since actor's last change: that change, and
+            # everything before it, can never be undone any more
+            stack = []
+        stack.append((before, after, label))
+        if len(stack) > self.history_limit:
+            del stack[0]
+        # Every other actor's history (and actor's redo) is stale from now on.
+        # Drop it rather than keep old maps alive for every session that ever
+        # connected.
+        self._undo_stacks = {actor: stack}
+        self._redo_stacks = {}
+    
+    @contextmanager
+    def batch(self, label="bulk change", actor=None):
+        """Group several mutations into a single undo step.
+        
+        The lock is held for the whole batch, so other writers wait for it.
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                before = self.students
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                # Only record a step if something actually changed
+                if self._batch_depth == 0 and self.students is not before:
+                    self._push_history(actor, before, self.students, label)
+    
+    def snapshot(self):
+        """Return an immutable view of the current students (O(1))"""
+        return self.students
+    
+    @_synchronized
+    def restore(self, snapshot, actor=None):
+        """Replace the current students with a previous snapshot"""
+        self._commit(snapshot, "restore snapshot", actor)
+        return True, "Snapshot restored"
+    
+    def undo_label(self, actor=None):
+        """Description of the change undo(actor) would revert, or None"""
+        stack = self._undo_stacks.get(actor)
+        if stack and stack[-1][1] is self.students:
+            return stack[-1][2]
+        return None
     
-    def add_student(self, student):
+    def redo_label(self, actor=None):
+        """Description of the change redo(actor) would re-apply, or None"""
+        stack = self._redo_stacks.get(actor)
+        if stack and stack[-1][0] is self.students:
+            return stack[-1][2]
+        return None
+    
+    def can_undo(self, actor=None):
+        return self.undo_label(actor) is not None
+    
+    def can_redo(self, actor=None):
+        return self.redo_label(actor) is not None
+    
+    @_synchronized
+    def undo(self, actor=None):
+        """Revert actor's last change, if nobody has changed anything since"""
+        stack = self._undo_stacks.get(actor)
+        if not stack:
+            return False, "Nothing to undo"
+        before, after, label = stack[-1]
+        if after is not self.students:
+            return False, "Someone else has changed the data since your last change, so it can't be undone"
+        stack.pop()
+        self.students = before
+        self._redo_stacks.setdefault(actor, []).append((before, after, label))
+        return True, f"Undone: {label}"
+    
+    @_synchronized
+    def redo(self, actor=None):
+        """Re-apply actor's last undone change, if nobody has changed anything since"""
+        stack = self._redo_stacks.get(actor)
+        if not stack:
+            return False, "Nothing to redo"
+        before, after, label = stack[-1]
+        if before is not self.students:
+            return False, "Someone else has changed the data since, so it can't be redone"
+        stack.pop()
+        self.students = after
+        self._undo_stacks.setdefault(actor, []).append((before, after, label))
+        return True, f"Redone: {label}"
+    
+    @_synchronized
+    def add_student(self, student, actor=None):
         """Add a new student"""
         if student.student_id in self.students:
             return False, "Student ID already exists"
-        self.students[student.student_id] = student
+        self._commit(self.students.set(student.student_id, student),
+                     f"add {student.student_id} ({student.name})", actor)
         return True, "Student added successfully"
     
-    def update_student(self, student_id, **kwargs):
+    @_synchronized
+    def update_student(self, student_id, actor=None, **kwargs):
         """Update student information"""
         if student_id not in self.students:
             return False, "Student not found"
@@ -35,20 +192,23 @@ class Manager():
             }
             # This will raise ValueError if validation fails
             temp_student = Student(**temp_data)
+            temp_student.courses = Student.validate_courses(kwargs.get('courses', student.courses))
             
-            # If validation passes, update the actual student
-            for key, value in kwargs.items():
-                if hasattr(student, key):
-                    setattr(student, key, value)
+            # If validation passes, swap in the new student (copy-on-write,
+            # earlier snapshots keep the old object)
+            self._commit(self.students.set(student_id, temp_student),
+                         f"update {student_id} ({temp_student.name})", actor)
             return True, "Student updated successfully"
         except ValueError as e:
             return False, f"Validation error: {str(e)}"
     
-    def delete_student(self, student_id):
+    @_synchronized
+    def delete_student(self, student_id, actor=None):
         """Delete a student"""
         if student_id not in self.students:
             return False, "Student not found"
-        del self.students[student_id]
+        self._commit(self.students.delete(student_id),
+                     f"delete {student_id} ({self.students[student_id].name})", actor)
         return True, "Student deleted successfully"
     
     def get_student(self, student_id):
@@ -59,6 +219,41 @@ class Manager():
         """List all students"""
         return list(self.students.values())
     
+    def count_students(self):
+        """Number of students, O(1)"""
+        return len(self.students)
+    
+    def view_students(self):
+        """Read-only view of the current students without copying them.
+        
+        The view is over a snapshot: it can be iterated any number of times
+        (and has an O(1) len) while later changes go to a new map.
+        """
+        return self.students.values()
+    
+    def recent_students(self, n=5):
+        """The last n students added, oldest first (like list_students()[-n:])"""
+        students = self.students
+        recent = [students[sid] for sid in islice(reversed(students), n)]
+        recent.reverse()
+        return recent
+    
+    def student_options(self):
+        """Return (ids, labels) for student pickers, cached until the next change.
+        
+        ids is a tuple of student IDs in insertion order and labels maps each
+        ID to "ID - Name". Both are shared; do not modify them.
+        """
+        # Read the version before the map: if a write lands in between, the
+        # cache is stored under the older version and rebuilt on the next call
+        version = self.version
+        cached_version, ids, labels = self._options_cache
+        if cached_version != version:
+            labels = {sid: f"{sid} - {s.name}" for sid, s in self.students.items()}
+            ids = tuple(labels)
+            self._options_cache = (version, ids, labels)
+        return ids, labels
+    
     def search_students(self, **filters):
         """Search students by various criteria"""
         results = []
@@ -79,42 +274,220 @@ class Manager():
         return results
 
 
+def shard_for(student_id, shards):
+    """Stable shard index for a student ID (hash() is salted per process)"""
+    return zlib.crc32(student_id.encode('utf-8')) % shards
+
+
+def _parse_json_file(path):
+    """Parse and validate one JSON file of students.
+    
+    Returns (students, messages), where students is a list of (seq, Student)
+    and seq is the record's position in the whole store (stored in shard
+    files, the position in the file otherwise). Kept at module level so it
+    can run in a worker process when loading shards in parallel.
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        return [], [f"Error: Failed to load JSON file {path}: {str(e)}"]
+    
+    students = []
+    messages = []
+    for position, (student_id, student_data) in enumerate(data.items()):
+        try:
+            students.append((student_data.get('seq', position), Student.from_dict(student_data)))
+        except (ValueError, KeyError) as e:
+            # Skip invalid student records and log the error
+            messages.append(f"Warning: Skipping invalid student record {student_id}: {str(e)}")
+    return students, messages
+
+
+def _parse_json_file_records(path):
+    """_parse_json_file for worker processes: returns validated plain tuples,
+    which unpickle far faster in the parent than Student objects"""
+    students, messages = _parse_json_file(path)
+    return [(seq, student.to_record()) for seq, student in students], messages
+
+
 class DataStorage:
-    def __init__(self, json_file='students.json'):
+    def __init__(self, json_file='students.json', shards=None, workers=None):
+        """shards: split records across this many files by student ID
+        (None keeps the single json_file). workers: processes used to parse
+        shards in parallel (None = one per CPU; 1, or a single CPU, parses
+        in this process).
+        """
         self.json_file = json_file
+        self.shards = shards
+        self.workers = workers
+        self.load_seconds = None
+        self.load_error = None
+        self._save_lock = threading.Lock()
+        # Shard index -> {student_id: (seq, Student)} as last loaded or written
+        self._saved_shards = {}
+        # Student ID -> seq, its position in the store across all shards;
+        # kept in shard files so a reload can restore insertion order
+        self._seqs = {}
+        self._next_seq = 0
+    
+    def shard_path(self, index):
+        """File holding shard `index`, e.g. students.3-of-8.json"""
+        root, ext = os.path.splitext(self.json_file)
+        return f"{root}.{index}-of-{self.shards}{ext}"
+    
+    def manifest_path(self):
+        """Records how many shards the data is stored in, e.g. students.shards.json"""
+        root, ext = os.path.splitext(self.json_file)
+        return f"{root}.shards{ext}"
+    
+    def _layout_error(self):
+        """Why the data on disk cannot be used with this shard setting, or None"""
+        if not os.path.exists(self.manifest_path()):
+            return None
+        with open(self.manifest_path(), 'r') as f:
+            stored = json.load(f)['shards']
+        if stored != self.shards:
+            return (f"{self.json_file} is stored in {stored} shards (see {self.manifest_path()}) "
+                    f"but this storage was opened with shards={self.shards}; "
+                    f"open it with shards={stored}")
+        return None
     
     def save_to_json(self, manager):
         """Save students data to JSON file"""
-        data = {sid: student.to_dict() for sid, student in manager.students.items()}
-        with open(self.json_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        # The UI and the HTTP API may both save; never write a file twice at once
+        with self._save_lock:
+            # Never overwrite data that failed to load, or that is stored in
+            # a different layout
+            if self.load_error:
+                raise RuntimeError(f"Refusing to save over data that failed to load: {self.load_error}")
+            error = self._layout_error()
+            if error:
+                raise RuntimeError(error)
+            if self.shards:
+                self._save_shards(manager)
+                return
+            data = {sid: student.to_dict() for sid, student in manager.students.items()}
+            with open(self.json_file, 'w') as f:
+                json.dump(data, f, indent=4)
+    
+    def _save_shards(self, manager):
+        """Rewrite only the shards whose students changed since the last save.
+        
+        Manager never modifies a stored Student in place (updates swap in a
+        new object), so comparing object identity is enough to spot changes.
+        """
+        groups = [{} for _ in range(self.shards)]
+        last_seq = -1
+        for sid, student in manager.students.items():
+            seq = self._seqs.get(sid)
+            if seq is None or seq <= last_seq:
+                # New, or re-added after students saved later than it was:
+                # give it a seq after everything so far
+                seq = self._seqs[sid] = self._next_seq
+                self._next_seq += 1
+            last_seq = seq
+            groups[shard_for(sid, self.shards)][sid] = (seq, student)
+        
+        for index, group in enumerate(groups):
+            saved = self._saved_shards.get(index)
+            if saved is not None and len(saved) == len(group) and \
+                    all(sid in saved and saved[sid][0] == seq and saved[sid][1] is student
+                        for sid, (seq, student) in group.items()):
+                continue
+            
+            path = self.shard_path(index)
+            data = {sid: {**student.to_dict(), 'seq': seq} for sid, (seq, student) in group.items()}
+            with open(path + '.tmp', 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(path + '.tmp', path)
+            self._saved_shards[index] = group
+        
+        if not os.path.exists(self.manifest_path()):
+            # First sharded save: record the layout, then move the old single
+            # file aside so nothing reads its now stale contents
+            with open(self.manifest_path() + '.tmp', 'w') as f:
+                json.dump({'shards': self.shards}, f)
+            os.replace(self.manifest_path() + '.tmp', self.manifest_path())
+            if os.path.exists(self.json_file):
+                os.replace(self.json_file, self.json_file + '.pre-shard')
+    
+    def load_in_background(self, manager):
+        """Start load_from_json on a daemon thread and return the thread.
+        
+        The loaded students are swapped into the manager in one step at the
+        end, so readers never see a half-loaded store. join() the thread
+        before making changes.
+        """
+        thread = threading.Thread(target=self.load_from_json, args=(manager,),
+                                  name="student-loader", daemon=True)
+        thread.start()
+        return thread
     
     def load_from_json(self, manager):
         """Load students data from JSON file"""
-        if not os.path.exists(self.json_file):
+        start = time.perf_counter()
+        try:
+            self._load_from_json(manager)
+        except Exception as e:
+            # A malformed record, a crashed worker pool, ...: the store is
+            # incomplete, so record why and never save it over the files
+            self.load_error = f"Failed to load {self.json_file}: {type(e).__name__}: {str(e)}"
+            print(f"Error: {self.load_error}")
+        finally:
+            self.load_seconds = time.perf_counter() - start
+    
+    def _load_from_json(self, manager):
+        self.load_error = self._layout_error()
+        if self.load_error:
+            # Refuse rather than fall back to files that may be stale
+            print(f"Error: {self.load_error}")
             return
         
-        try:
-            with open(self.json_file, 'r') as f:
-                data = json.load(f)
+        if self.shards and os.path.exists(self.manifest_path()):
+            shards = [(i, self.shard_path(i)) for i in range(self.shards)]
+            missing = [path for _, path in shards if not os.path.exists(path)]
+            if missing:
+                # Saving would write the missing shards back empty
+                self.load_error = f"Shard file(s) missing: {', '.join(missing)}"
+                print(f"Error: {self.load_error}")
+                return
+        else:
+            # Not sharded yet: read the single file, the first save splits it
+            if not os.path.exists(self.json_file):
+                return
+            shards = [(None, self.json_file)]
+        paths = [path for _, path in shards]
+        
+        workers = min(self.workers or os.cpu_count() or 1, len(paths))
+        # Everything below only allocates acyclic objects (records, students,
+        # map nodes), so GC passes over them are pure overhead
+        with paused_gc():
+            if workers > 1:
+                # spawn, not fork: this usually runs on the loader thread of a
+                # multi-threaded server, and forking a threaded process is unsafe.
+                # Workers parse and validate; the parent only unpickles plain
+                # tuples and rebuilds Students without re-validating.
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                    results = [([(seq, Student.from_record(r)) for seq, r in records], messages)
+                               for records, messages in pool.map(_parse_json_file_records, paths)]
+            else:
+                results = [_parse_json_file(path) for path in paths]
             
-            for student_id, student_data in data.items():
-                try:
-                    student = Student(
-                        student_data['student_id'],
-                        student_data['name'],
-                        student_data['age'],
-                        student_data['grade'],
-                        student_data['email'],
-                        student_data['phone'],
-                        student_data.get('attendance', 100.0)
-                    )
-                    student.courses = student_data.get('courses', [])
-                    manager.students[student.student_id] = student
-                except (ValueError, KeyError) as e:
-                    # Skip invalid student records and log the error
-                    print(f"Warning: Skipping invalid student record {student_id}: {str(e)}")
-                    continue
-        except json.JSONDecodeError as e:
-            print(f"Error: Failed to load JSON file: {str(e)}")
-            return
+            loaded = []
+            for (index, _), (students, messages) in zip(shards, results):
+                for message in messages:
+                    print(message)
+                loaded.extend(students)
+                if index is not None:
+                    self._saved_shards[index] = {s.student_id: (seq, s) for seq, s in students}
+            # Shards group students by ID; put them back in insertion order
+            loaded.sort(key=lambda item: item[0])
+            self._seqs = {s.student_id: seq for seq, s in loaded}
+            self._next_seq = loaded[-1][0] + 1 if loaded else 0
+            
+            pairs = list(manager.students.items())
+            pairs.extend((s.student_id, s) for _, s in loaded)
+            # Build the map in one pass rather than one set() per student
+            manager.students = PersistentMap(pairs)
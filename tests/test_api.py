@@ -0,0 +1,146 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+import api
+from services import Manager, DataStorage
+
+
+def student(student_id, **overrides):
+    data = {"student_id": student_id, "name": "Ali Khan", "age": 20, "grade": "A",
+            "email": "ali@example.com", "phone": "03001234567", "courses": ["Math"],
+            "attendance": 90.0}
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def server(tmp_path):
+    manager = Manager()
+    storage = DataStorage(str(tmp_path / "students.json"))
+    server, saver = api.make_server(manager, storage, port=0, workers=2, save_delay=0.05)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    saver.stop()
+
+
+@pytest.fixture
+def request_json(server):
+    """Send a request on a fresh connection; returns (status, decoded body)"""
+    def request(method, path, payload=None, body=None, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        if payload is not None:
+            body = json.dumps(payload)
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        result = response.status, json.loads(response.read())
+        conn.close()
+        return result
+    return request
+
+
+def test_bulk_add_and_lookup(request_json):
+    status, body = request_json("POST", "/students", [student("S1"), student("S2"), student("S1")])
+    assert status == 200
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert body["results"][2]["message"] == "Student ID already exists"
+
+    status, body = request_json("GET", "/students/S2")
+    assert status == 200 and body["student_id"] == "S2"
+    assert request_json("GET", "/students/S9")[0] == 404
+
+
+def test_lookup_unquotes_the_id(request_json):
+    request_json("POST", "/students", [student("X 3")])
+    status, body = request_json("GET", "/students/X%203")
+    assert status == 200 and body["student_id"] == "X 3"
+
+
+def test_list_pagination_and_filters(request_json):
+    request_json("POST", "/students", [student(f"S{i}", grade="B" if i % 2 else "A") for i in range(10)])
+    status, body = request_json("GET", "/students?offset=2&limit=3")
+    assert body["total"] == 10
+    assert [s["student_id"] for s in body["students"]] == ["S2", "S3", "S4"]
+
+    status, body = request_json("GET", "/students?grade=B&limit=2")
+    assert body["total"] == 5
+    assert [s["student_id"] for s in body["students"]] == ["S1", "S3"]
+
+    assert request_json("GET", "/students?limit=x")[0] == 400
+
+
+def test_invalid_students_are_reported(request_json):
+    status, body = request_json("POST", "/students", [
+        student("S1", age=500),
+        student("S2", courses="Math"),
+        {"student_id": "S3"},
+        "not an object",
+    ])
+    assert status == 200
+    assert body["failed"] == 4
+    assert body["results"][2]["message"] == "Missing field: 'name'"
+
+
+def test_bulk_attendance(server, request_json):
+    request_json("POST", "/students", [student("S1"), student("S2")])
+    status, body = request_json("POST", "/attendance", [
+        {"student_id": "S1", "attendance": 50},
+        {"student_id": "S9", "attendance": 50},
+        {"student_id": 1, "attendance": 50},
+        {"student_id": "S2", "attendance": 150},
+    ])
+    assert [r["success"] for r in body["results"]] == [True, False, False, False]
+    assert server.RequestHandlerClass.manager.get_student("S1").attendance == 50.0
+
+
+@pytest.mark.parametrize("body", [
+    '[{"student_id": "S1", "attendance": NaN}]',
+    '[{"student_id": "S1", "attendance": Infinity}]',
+    '[{"student_id": "S1", "attendance": 1e999}]',
+    '{"student_id": "S1"}',
+    '[{',
+])
+def test_bad_bodies_are_rejected(request_json, body):
+    status, _ = request_json("POST", "/attendance", body=body)
+    assert status == 400
+
+
+def test_non_finite_age_is_rejected(server, request_json):
+    status, _ = request_json("POST", "/students", body='[{"student_id": "S1", "age": -Infinity}]')
+    assert status == 400
+    assert server.RequestHandlerClass.manager.count_students() == 0
+
+
+def test_negative_content_length_is_rejected(request_json):
+    status, body = request_json("POST", "/students", body=b"[]", headers={"Content-Length": "-1"})
+    assert status == 400
+
+
+def test_bulk_request_is_one_undo_step_for_the_api(server, request_json):
+    manager = server.RequestHandlerClass.manager
+    request_json("POST", "/students", [student("S1"), student("S2")])
+    assert not manager.can_undo("some-session")
+    assert manager.undo_label("api") == "API bulk add of 2 students"
+    assert manager.undo("api")[0]
+    assert manager.count_students() == 0
+
+
+def test_writes_are_saved(server, request_json, tmp_path):
+    request_json("POST", "/students", [student("S1")])
+    path = tmp_path / "students.json"
+    deadline = time.monotonic() + 5
+    saved = None
+    while saved is None and time.monotonic() < deadline:
+        try:
+            saved = json.loads(path.read_text())
+        except (OSError, ValueError):
+            # Not written yet, or caught mid-write
+            time.sleep(0.02)
+    assert list(saved) == ["S1"]
+    assert request_json("GET", "/health")[1]["save_error"] is None
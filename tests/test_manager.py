@@ -0,0 +1,136 @@
+import pytest
+
+from models import Student
+from services import Manager
+
+
+def make_student(student_id, name="Ali Khan", attendance=90.0):
+    return Student(student_id, name, 20, "A", "ali@example.com", "03001234567", attendance)
+
+
+@pytest.fixture
+def manager():
+    manager = Manager()
+    for i in range(3):
+        manager.add_student(make_student(f"S{i}"), actor="setup")
+    return manager
+
+
+def ids(manager):
+    return list(manager.students)
+
+
+def test_undo_and_redo_a_change(manager):
+    manager.add_student(make_student("S3"), actor="me")
+    assert manager.undo_label("me") == "add S3 (Ali Khan)"
+
+    assert manager.undo("me") == (True, "Undone: add S3 (Ali Khan)")
+    assert ids(manager) == ["S0", "S1", "S2"]
+    assert manager.redo_label("me") == "add S3 (Ali Khan)"
+
+    assert manager.redo("me")[0]
+    assert ids(manager) == ["S0", "S1", "S2", "S3"]
+    assert not manager.can_redo("me")
+
+
+def test_undo_walks_back_through_own_changes(manager):
+    manager.update_student("S0", actor="me", name="Sara Khan")
+    manager.delete_student("S1", actor="me")
+    assert manager.undo("me")[0]
+    assert ids(manager) == ["S0", "S1", "S2"]
+    assert manager.undo("me")[0]
+    assert manager.get_student("S0").name == "Ali Khan"
+
+
+def test_update_does_not_touch_snapshots(manager):
+    snapshot = manager.snapshot()
+    stored = manager.get_student("S0")
+    manager.update_student("S0", actor="me", attendance=10.0)
+    assert stored.attendance == 90.0
+    assert snapshot["S0"] is stored
+    assert manager.get_student("S0").attendance == 10.0
+
+
+def test_invalid_update_changes_nothing(manager):
+    version = manager.version
+    success, message = manager.update_student("S0", actor="me", courses="Math")
+    assert not success
+    assert manager.version == version
+    assert not manager.can_undo("me")
+
+
+def test_batch_is_one_undo_step(manager):
+    with manager.batch("set all to 100%", actor="me"):
+        for sid in ids(manager):
+            manager.update_student(sid, actor="me", attendance=100.0)
+    assert manager.undo_label("me") == "set all to 100%"
+    assert manager.undo("me")[0]
+    assert all(s.attendance == 90.0 for s in manager.view_students())
+    assert not manager.can_undo("me")
+
+
+def test_empty_batch_records_nothing(manager):
+    with manager.batch("nothing", actor="me"):
+        manager.update_student("missing", actor="me", attendance=1.0)
+    assert not manager.can_undo("me")
+
+
+def test_cannot_undo_someone_elses_change(manager):
+    manager.add_student(make_student("S3"), actor="me")
+    assert not manager.can_undo("other")
+    assert manager.undo("other") == (False, "Nothing to undo")
+
+
+def test_undo_refused_after_another_write(manager):
+    manager.add_student(make_student("S3"), actor="me")
+    manager.add_student(make_student("S4"), actor="api")
+    assert not manager.can_undo("me")
+    assert not manager.undo("me")[0]
+    assert ids(manager)[-2:] == ["S3", "S4"]
+
+
+def test_stale_history_is_dropped(manager):
+    for i in range(20):
+        manager.add_student(make_student(f"T{i}"), actor=f"session-{i}")
+    # Only the latest writer can still undo; nobody else's snapshots are kept
+    assert list(manager._undo_stacks) == ["session-19"]
+    assert manager.can_undo("session-19")
+
+
+def test_history_limit():
+    manager = Manager(history_limit=2)
+    for i in range(4):
+        manager.add_student(make_student(f"S{i}"), actor="me")
+    assert manager.undo("me")[0]
+    assert manager.undo("me")[0]
+    assert not manager.undo("me")[0]
+    assert ids(manager) == ["S0", "S1"]
+
+
+def test_new_change_clears_redo(manager):
+    manager.add_student(make_student("S3"), actor="me")
+    manager.undo("me")
+    manager.add_student(make_student("S4"), actor="me")
+    assert not manager.can_redo("me")
+
+
+def test_restore_snapshot_is_undoable(manager):
+    snapshot = manager.snapshot()
+    manager.delete_student("S0", actor="me")
+    manager.restore(snapshot, actor="me")
+    assert ids(manager) == ["S0", "S1", "S2"]
+    assert manager.undo("me")[0]
+    assert ids(manager) == ["S1", "S2"]
+
+
+def test_student_options_follow_changes(manager):
+    student_ids, labels = manager.student_options()
+    assert student_ids == ("S0", "S1", "S2")
+    assert manager.student_options()[0] is student_ids
+    manager.update_student("S1", actor="me", name="Sara Khan")
+    assert manager.student_options()[1]["S1"] == "S1 - Sara Khan"
+
+
+def test_recent_students(manager):
+    manager.add_student(make_student("S3"), actor="me")
+    assert [s.student_id for s in manager.recent_students(2)] == ["S2", "S3"]
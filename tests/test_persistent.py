@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+from persistent import PersistentMap, WIDTH
+
+
+class Key():
+    """A key with a chosen hash, to force collisions in the HAMT"""
+
+    def __init__(self, name, h):
+        self.name = name
+        self.h = h
+
+    def __hash__(self):
+        return self.h
+
+    def __eq__(self, other):
+        return isinstance(other, Key) and self.name == other.name
+
+    def __repr__(self):
+        return f"Key({self.name!r}, {self.h})"
+
+
+def random_hash(rng):
+    kind = rng.random()
+    if kind < 0.3:
+        # Identical full hashes: collision nodes
+        return rng.choice([7, -7, 2 ** 63 - 1])
+    if kind < 0.6:
+        # Same low bits, different high bits: deep paths through the trie
+        return 12345 | (rng.randrange(8) << 55)
+    return rng.getrandbits(64) - 2 ** 63
+
+
+def assert_same(pmap, expected):
+    assert len(pmap) == len(expected)
+    assert list(pmap) == list(expected)
+    assert list(pmap.items()) == list(expected.items())
+    assert list(pmap.values()) == list(expected.values())
+    assert list(reversed(pmap)) == list(reversed(expected))
+    for key, value in expected.items():
+        assert key in pmap
+        assert pmap[key] is value
+        assert pmap.get(key) is value
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_matches_dict_under_random_operations(seed):
+    rng = random.Random(seed)
+    keys = [Key(i, random_hash(rng)) for i in range(300)]
+    pmap = PersistentMap()
+    expected = {}
+    snapshots = []
+
+    for step in range(3000):
+        key = rng.choice(keys)
+        roll = rng.random()
+        if roll < 0.55:
+            value = object()
+            pmap = pmap.set(key, value)
+            expected[key] = value
+        elif roll < 0.9:
+            if key in expected:
+                pmap = pmap.delete(key)
+                del expected[key]
+            else:
+                with pytest.raises(KeyError):
+                    pmap.delete(key)
+        else:
+            assert (key in pmap) == (key in expected)
+            assert pmap.get(key, "missing") is expected.get(key, "missing")
+        if step % 250 == 0:
+            snapshots.append((pmap, dict(expected)))
+
+    assert_same(pmap, expected)
+    # Older versions are untouched by everything done after them
+    for snapshot, contents in snapshots:
+        assert_same(snapshot, contents)
+
+
+def test_missing_key_raises():
+    pmap = PersistentMap({"a": 1})
+    with pytest.raises(KeyError):
+        pmap["b"]
+    assert pmap.get("b") is None
+
+
+def test_set_existing_key_keeps_position():
+    pmap = PersistentMap([("a", 1), ("b", 2), ("c", 3)])
+    assert list(pmap.set("a", 10).items()) == [("a", 10), ("b", 2), ("c", 3)]
+
+
+def test_readding_deleted_key_moves_it_to_the_end():
+    pmap = PersistentMap([("a", 1), ("b", 2), ("c", 3)])
+    assert list(pmap.delete("a").set("a", 1)) == ["b", "c", "a"]
+
+
+@pytest.mark.parametrize("size", [0, 1, WIDTH, WIDTH + 1, WIDTH * WIDTH + 5])
+def test_bulk_build_matches_repeated_set(size):
+    pairs = [(f"k{i}", i) for i in range(size)]
+    # Duplicate keys: last value wins, first position is kept
+    pairs += [(f"k{i}", -i) for i in range(0, size, 3)]
+    built = PersistentMap()
+    for key, value in pairs:
+        built = built.set(key, value)
+    assert_same(PersistentMap(pairs), dict(built.items()))
+    assert list(PersistentMap(pairs).items()) == list(built.items())
+
+
+def test_compaction_after_many_deletes_keeps_order():
+    pmap = PersistentMap((i, str(i)) for i in range(WIDTH * 4))
+    expected = dict(pmap.items())
+    for i in range(0, WIDTH * 4, 4):
+        for j in (i, i + 1, i + 2):
+            pmap = pmap.delete(j)
+            del expected[j]
+    assert_same(pmap, expected)
+    # Still a working map after the rebuild
+    pmap = pmap.set("new", 1)
+    expected["new"] = 1
+    assert_same(pmap, expected)
+
+
+def test_delete_everything():
+    pmap = PersistentMap((i, i) for i in range(100))
+    for i in range(100):
+        pmap = pmap.delete(i)
+    assert_same(pmap, {})
+    assert_same(pmap.set(5, 5), {5: 5})
@@ -0,0 +1,133 @@
+import json
+import os
+
+import pytest
+
+from models import Student
+from services import Manager, DataStorage, shard_for
+
+
+def make_student(student_id, name="Ali Khan"):
+    return Student(student_id, name, 20, "A", "ali@example.com", "03001234567", 90.0)
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    manager = Manager()
+    for i in range(40):
+        manager.add_student(make_student(f"S{i}"))
+    path = str(tmp_path / "students.json")
+    DataStorage(path).save_to_json(manager)
+    return path
+
+
+def load(json_file, **kwargs):
+    manager = Manager()
+    storage = DataStorage(json_file, **kwargs)
+    storage.load_from_json(manager)
+    return manager, storage
+
+
+def test_single_file_round_trip(json_file):
+    manager, storage = load(json_file)
+    assert storage.load_error is None
+    assert list(manager.students) == [f"S{i}" for i in range(40)]
+
+
+def test_invalid_records_are_skipped(tmp_path):
+    path = tmp_path / "students.json"
+    good = make_student("S1").to_dict()
+    path.write_text(json.dumps({"S1": good, "S2": {**good, "student_id": "S2", "age": 500}}))
+    manager, storage = load(str(path))
+    assert storage.load_error is None
+    assert list(manager.students) == ["S1"]
+
+
+def test_failed_load_blocks_saving(tmp_path):
+    path = tmp_path / "students.json"
+    path.write_text(json.dumps({"S1": make_student("S1").to_dict(), "S2": "oops"}))
+    manager, storage = load(str(path))
+    assert storage.load_error.startswith("Failed to load")
+    manager.add_student(make_student("S3"))
+    with pytest.raises(RuntimeError):
+        storage.save_to_json(manager)
+    assert set(json.loads(path.read_text())) == {"S1", "S2"}
+
+
+def test_first_sharded_save_moves_the_single_file_aside(json_file):
+    manager, storage = load(json_file, shards=4)
+    storage.save_to_json(manager)
+    assert not os.path.exists(json_file)
+    assert os.path.exists(json_file + ".pre-shard")
+    with open(storage.manifest_path()) as f:
+        assert json.load(f) == {"shards": 4}
+    for i in range(4):
+        with open(storage.shard_path(i)) as f:
+            assert all(shard_for(sid, 4) == i for sid in json.load(f))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sharded_reload_keeps_insertion_order(json_file, workers):
+    manager, storage = load(json_file, shards=4)
+    storage.save_to_json(manager)
+    manager, storage = load(json_file, shards=4, workers=workers)
+    assert storage.load_error is None
+    assert list(manager.students) == [f"S{i}" for i in range(40)]
+    assert [s.student_id for s in manager.recent_students(2)] == ["S38", "S39"]
+
+
+def test_readded_student_goes_last_after_reload(json_file):
+    manager, storage = load(json_file, shards=4)
+    storage.save_to_json(manager)
+    manager.delete_student("S3")
+    storage.save_to_json(manager)
+    manager.add_student(make_student("S3"))
+    storage.save_to_json(manager)
+    reloaded, _ = load(json_file, shards=4)
+    assert list(reloaded.students) == list(manager.students)
+    assert list(reloaded.students)[-1] == "S3"
+
+
+def test_only_changed_shards_are_rewritten(json_file, monkeypatch):
+    manager, storage = load(json_file, shards=4)
+    storage.save_to_json(manager)
+
+    written = []
+    replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda src, dst: (written.append(dst), replace(src, dst)))
+
+    storage.save_to_json(manager)
+    assert written == []
+
+    manager.update_student("S5", name="Sara Khan")
+    storage.save_to_json(manager)
+    assert written == [storage.shard_path(shard_for("S5", 4))]
+
+    reloaded, _ = load(json_file, shards=4)
+    assert reloaded.get_student("S5").name == "Sara Khan"
+
+
+def test_other_shard_count_is_refused(json_file):
+    manager, storage = load(json_file, shards=4)
+    storage.save_to_json(manager)
+
+    manager, storage = load(json_file, shards=8)
+    assert "shards=4" in storage.load_error
+    assert manager.count_students() == 0
+    with pytest.raises(RuntimeError):
+        storage.save_to_json(manager)
+
+    # Without sharding, the stale .pre-shard file must not be read either
+    manager, storage = load(json_file)
+    assert storage.load_error
+
+
+def test_missing_shard_file_is_refused(json_file):
+    manager, storage = load(json_file, shards=4)
+    storage.save_to_json(manager)
+    os.remove(storage.shard_path(2))
+
+    manager, storage = load(json_file, shards=4)
+    assert "missing" in storage.load_error
+    with pytest.raises(RuntimeError):
+        storage.save_to_json(manager)